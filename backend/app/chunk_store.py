@@ -0,0 +1,289 @@
+import argparse
+import contextlib
+import json
+import mmap
+import os
+import struct
+import tempfile
+import zlib
+from collections.abc import Iterable, Iterator, Sequence
+from pathlib import Path
+
+from .config import get_settings
+
+try:
+    import zstandard
+except ImportError:  # optional dependency
+    zstandard = None
+
+CHUNK_STORE_FILE = "chunks.bin"
+LEGACY_CHUNKS_FILE = "chunks.json"
+
+# Layout:
+#   header  : magic, version, codec, reserved, chunk_count, block_size, block_count
+#   offsets : (block_count + 1) little-endian u64 absolute file offsets
+#   blocks  : per-block payload, optionally compressed; once decoded, a block is a
+#             run of records, each a u32 byte length followed by UTF-8 text
+MAGIC = b"PSCK"
+VERSION = 1
+HEADER = struct.Struct("<4sHBBIII")
+OFFSET = struct.Struct("<Q")
+RECORD_LEN = struct.Struct("<I")
+
+FileVersion = tuple[int, int, int]
+
+CODECS: dict[str, int] = {"none": 0, "zlib": 1, "zstd": 2}
+CODEC_NAMES = {value: key for key, value in CODECS.items()}
+
+
+def file_version(stat: os.stat_result) -> FileVersion:
+    # Writes go through os.replace, so a new inode marks a new version even within one mtime tick.
+    return (stat.st_ino, stat.st_size, stat.st_mtime_ns)
+
+
+def _compress(codec: str, payload: bytes) -> bytes:
+    if codec == "zlib":
+        return zlib.compress(payload, 6)
+    if codec == "zstd":
+        return zstandard.ZstdCompressor(level=3).compress(payload)
+    return payload
+
+
+def _decompress(codec: str, payload: bytes) -> bytes:
+    if codec == "zlib":
+        return zlib.decompress(payload)
+    if codec == "zstd":
+        if zstandard is None:
+            raise RuntimeError("chunk store uses zstd but the zstandard package is not installed")
+        return zstandard.ZstdDecompressor().decompress(payload)
+    return payload
+
+
+def _resolve_codec(codec: str) -> str:
+    if codec not in CODECS:
+        raise ValueError(f"unknown chunk store codec: {codec}")
+    if codec == "zstd" and zstandard is None:
+        # zstd is optional; zlib keeps per-block compression available without it.
+        return "zlib"
+    return codec
+
+
+def write_chunk_store(path: Path, chunks: Sequence[str], codec: str = "none", block_size: int = 16) -> None:
+    codec = _resolve_codec(codec)
+    if codec == "none":
+        block_size = 1
+    block_size = max(1, block_size)
+
+    blocks: list[bytes] = []
+    for start in range(0, len(chunks), block_size):
+        records = bytearray()
+        for chunk in chunks[start : start + block_size]:
+            encoded = chunk.encode("utf-8")
+            records += RECORD_LEN.pack(len(encoded))
+            records += encoded
+        blocks.append(_compress(codec, bytes(records)))
+
+    header = HEADER.pack(MAGIC, VERSION, CODECS[codec], 0, len(chunks), block_size, len(blocks))
+    offset = HEADER.size + OFFSET.size * (len(blocks) + 1)
+    offsets = bytearray()
+    for block in blocks:
+        offsets += OFFSET.pack(offset)
+        offset += len(block)
+    offsets += OFFSET.pack(offset)
+
+    # Unique temp name: the upload pipeline and reprocess jobs may write the same paper at once.
+    fd, tmp_name = tempfile.mkstemp(dir=path.parent, prefix=path.name + ".", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as output:
+            output.write(header)
+            output.write(offsets)
+            for block in blocks:
+                output.write(block)
+        os.replace(tmp_name, path)
+    except BaseException:
+        with contextlib.suppress(FileNotFoundError):
+            os.unlink(tmp_name)
+        raise
+
+
+class ChunkReader(Sequence[str]):
+    """Random access over a chunk store file without decoding the whole of it."""
+
+    def __init__(self, path: Path) -> None:
+        self.path = path
+        self._file = path.open("rb")
+        try:
+            self._mm = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError as exc:
+            # mmap rejects empty files.
+            self._file.close()
+            raise ValueError(f"not a supported chunk store: {path}") from exc
+        except Exception:
+            self._file.close()
+            raise
+        self._cached_block: tuple[int, bytes] | None = None
+        try:
+            magic, version, codec, _, count, block_size, block_count = HEADER.unpack_from(self._mm, 0)
+        except struct.error:
+            magic = None
+        if (
+            magic != MAGIC
+            or version != VERSION
+            or codec not in CODEC_NAMES
+            or not self._layout_is_valid(count, block_size, block_count)
+        ):
+            self.close()
+            raise ValueError(f"not a supported chunk store: {path}")
+        # Identity of the file this reader mapped, even if the path is replaced afterwards.
+        self.version = file_version(os.fstat(self._file.fileno()))
+        self.codec = CODEC_NAMES[codec]
+        self.block_size = block_size
+        self.block_count = block_count
+        self._count = count
+
+    def _layout_is_valid(self, count: int, block_size: int, block_count: int) -> bool:
+        # Catches truncated or spliced files up front instead of serving a silent subset of chunks.
+        if block_size < 1 or block_count != -(-count // block_size):
+            return False
+        table_end = HEADER.size + OFFSET.size * (block_count + 1)
+        if table_end > len(self._mm):
+            return False
+        previous = table_end
+        for (offset,) in OFFSET.iter_unpack(self._mm[HEADER.size : table_end]):
+            if offset < previous:
+                return False
+            previous = offset
+        (first,) = OFFSET.unpack_from(self._mm, HEADER.size)
+        return first == table_end and previous == len(self._mm)
+
+    def __len__(self) -> int:
+        return self._count
+
+    def __getitem__(self, index):  # type: ignore[override]
+        if isinstance(index, slice):
+            return [self[idx] for idx in range(*index.indices(self._count))]
+        if index < 0:
+            index += self._count
+        if not 0 <= index < self._count:
+            raise IndexError("chunk index out of range")
+        block_index, position = divmod(index, self.block_size)
+        return self._records(self._block(block_index))[position]
+
+    def __iter__(self) -> Iterator[str]:
+        for block_index in range(self.block_count):
+            yield from self._records(self._block(block_index))
+
+    def _block(self, block_index: int) -> bytes:
+        if self._cached_block and self._cached_block[0] == block_index:
+            return self._cached_block[1]
+        (start,) = OFFSET.unpack_from(self._mm, HEADER.size + OFFSET.size * block_index)
+        (end,) = OFFSET.unpack_from(self._mm, HEADER.size + OFFSET.size * (block_index + 1))
+        try:
+            payload = _decompress(self.codec, self._mm[start:end])
+        except zlib.error as exc:
+            raise ValueError(f"corrupt chunk store block {block_index}: {self.path}") from exc
+        self._cached_block = (block_index, payload)
+        return payload
+
+    @staticmethod
+    def _records(payload: bytes) -> list[str]:
+        records: list[str] = []
+        cursor = 0
+        while cursor < len(payload):
+            if cursor + RECORD_LEN.size > len(payload):
+                raise ValueError("corrupt chunk store record")
+            (length,) = RECORD_LEN.unpack_from(payload, cursor)
+            cursor += RECORD_LEN.size
+            if cursor + length > len(payload):
+                raise ValueError("corrupt chunk store record")
+            records.append(payload[cursor : cursor + length].decode("utf-8"))
+            cursor += length
+        return records
+
+    def close(self) -> None:
+        self._cached_block = None
+        if not self._mm.closed:
+            self._mm.close()
+        self._file.close()
+
+    def __enter__(self) -> "ChunkReader":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+
+class LegacyChunkReader(list[str]):
+    """Adapter giving a parsed `chunks.json` the same interface as `ChunkReader`."""
+
+    def __init__(self, chunks: Iterable[str] = (), version: FileVersion = (0, 0, 0)) -> None:
+        super().__init__(chunks)
+        self.version = version
+
+    def close(self) -> None:
+        pass
+
+    def __enter__(self) -> "LegacyChunkReader":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+
+def open_chunk_store(paper_dir: Path) -> ChunkReader | LegacyChunkReader:
+    store_path = paper_dir / CHUNK_STORE_FILE
+    if store_path.exists():
+        return ChunkReader(store_path)
+    legacy_path = paper_dir / LEGACY_CHUNKS_FILE
+    if legacy_path.exists():
+        version = file_version(legacy_path.stat())
+        return LegacyChunkReader(json.loads(legacy_path.read_text(encoding="utf-8")), version=version)
+    return LegacyChunkReader()
+
+
+def migrate_paper_dir(paper_dir: Path, codec: str = "none", block_size: int = 16, keep_legacy: bool = False) -> bool:
+    legacy_path = paper_dir / LEGACY_CHUNKS_FILE
+    if not legacy_path.exists():
+        return False
+    chunks = json.loads(legacy_path.read_text(encoding="utf-8"))
+    write_chunk_store(paper_dir / CHUNK_STORE_FILE, chunks, codec=codec, block_size=block_size)
+    if not keep_legacy:
+        legacy_path.unlink()
+    return True
+
+
+def migrate_processed_dir(
+    processed_dir: Path,
+    codec: str = "none",
+    block_size: int = 16,
+    keep_legacy: bool = False,
+) -> list[str]:
+    migrated: list[str] = []
+    for paper_dir in sorted(path for path in processed_dir.iterdir() if path.is_dir()):
+        if migrate_paper_dir(paper_dir, codec=codec, block_size=block_size, keep_legacy=keep_legacy):
+            migrated.append(paper_dir.name)
+    return migrated
+
+
+def main() -> None:
+    settings = get_settings()
+    parser = argparse.ArgumentParser(description="Convert legacy chunks.json files into the binary chunk store.")
+    parser.add_argument("processed_dir", type=Path, help="path to data/processed")
+    parser.add_argument("--codec", choices=sorted(CODECS), default=settings.chunk_store_codec)
+    parser.add_argument("--block-size", type=int, default=settings.chunk_store_block_size)
+    parser.add_argument("--keep-legacy", action="store_true", help="keep chunks.json next to chunks.bin")
+    args = parser.parse_args()
+
+    migrated = migrate_processed_dir(
+        args.processed_dir,
+        codec=args.codec,
+        block_size=args.block_size,
+        keep_legacy=args.keep_legacy,
+    )
+    print(f"migrated {len(migrated)} paper(s)")
+    for paper_id in migrated:
+        print(f"  {paper_id}")
+
+
+if __name__ == "__main__":
+    main()
@@ -11,6 +11,14 @@ class Settings(BaseSettings):
     cors_origins: str = "*"
     max_chunk_chars: int = 900
     chunk_overlap: int = 120
+    chunk_store_codec: str = "none"
+    chunk_store_block_size: int = 16
+    index_cache_size: int = 32
+    warmup_paper_count: int = 5
+    reprocess_workers: int = 2
+    export_prefetch: int = 4
+    # Empty disables /api/admin/*; otherwise clients send it as X-Admin-Token.
+    admin_token: str = ""
     llm_model_name: str = "DemoPipeline-v1"
     embedding_model_name: str = "TokenOverlapRetriever-v1"
     model_provider: str = "LocalRuleEngine"
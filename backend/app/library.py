@@ -0,0 +1,231 @@
+import json
+import multiprocessing
+import uuid
+import zipfile
+from collections import deque
+from collections.abc import Callable, Iterable, Iterator
+from concurrent.futures import BrokenExecutor, Future, ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from pathlib import Path
+from typing import TypeVar
+
+from .config import Settings
+from .pipeline import process_paper, utc_now_iso
+from .schemas import PaperFilter, PaperMeta, ReprocessJob, ReprocessRequest
+from .storage import RESULT_FILE_MAP, Storage
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+
+class PapersBusyError(ValueError):
+    """Every selected paper is already claimed by a running reprocess job."""
+
+
+def select_papers(storage: Storage, paper_filter: PaperFilter, skip_processing: bool = False) -> list[PaperMeta]:
+    # An explicit empty paper_ids list selects nothing rather than the whole library.
+    wanted = set(paper_filter.paper_ids) if paper_filter.paper_ids is not None else None
+    selected: list[PaperMeta] = []
+    for paper in storage.list_papers():
+        if wanted is not None and paper.paper_id not in wanted:
+            continue
+        if skip_processing and paper.status == "processing":
+            continue
+        if paper_filter.status and paper.status != paper_filter.status:
+            continue
+        if paper_filter.domain_tag and paper_filter.domain_tag not in paper.domain_tags:
+            continue
+        selected.append(paper)
+    return selected
+
+
+def create_reprocess_job(
+    storage: Storage,
+    request: ReprocessRequest,
+    settings: Settings,
+    skip_paper_ids: set[str] | None = None,
+) -> ReprocessJob:
+    """Create and persist a job; papers still being uploaded or in `skip_paper_ids` are left out."""
+    if request.template_name not in storage.list_templates():
+        raise ValueError(f"摘要模板不存在：{request.template_name}")
+    skip_paper_ids = skip_paper_ids or set()
+    selected = [paper.paper_id for paper in select_papers(storage, request, skip_processing=True)]
+    paper_ids = [paper_id for paper_id in selected if paper_id not in skip_paper_ids]
+    if selected and not paper_ids:
+        raise PapersBusyError("符合条件的论文正在被其他任务处理。")
+    if not paper_ids:
+        raise ValueError("没有符合条件的论文。")
+    now = utc_now_iso()
+    job = ReprocessJob(
+        job_id=uuid.uuid4().hex,
+        status="queued",
+        paper_ids=paper_ids,
+        template_name=request.template_name,
+        max_chunk_chars=request.max_chunk_chars or settings.max_chunk_chars,
+        chunk_overlap=request.chunk_overlap if request.chunk_overlap is not None else settings.chunk_overlap,
+        message="任务已排队，等待执行。",
+        created_at=now,
+        updated_at=now,
+    )
+    storage.write_job(job)
+    return job
+
+
+def _reprocess_worker(
+    base_dir: str,
+    templates_dir: str,
+    chunk_codec: str,
+    chunk_block_size: int,
+    paper: dict,
+    template_name: str,
+    max_chunk_chars: int,
+    chunk_overlap: int,
+) -> list[str]:
+    # Runs in a pool process: rebuild Storage locally; papers.json is only written by the parent.
+    storage = Storage(
+        base_dir=Path(base_dir),
+        templates_dir=Path(templates_dir),
+        chunk_codec=chunk_codec,
+        chunk_block_size=chunk_block_size,
+    )
+    return process_paper(
+        paper_id=paper["paper_id"],
+        title=paper["title"],
+        target_language=paper["target_language"],
+        template_name=template_name,
+        storage=storage,
+        max_chunk_chars=max_chunk_chars,
+        chunk_overlap=chunk_overlap,
+    )
+
+
+def run_reprocess_job(
+    storage: Storage,
+    job: ReprocessJob,
+    workers: int,
+    on_progress: Callable[[ReprocessJob, str], None] | None = None,
+) -> ReprocessJob:
+    """Reprocess the job's pending papers; safe to call again on a partially finished job."""
+    papers = {paper.paper_id: paper for paper in storage.list_papers()}
+    pending = job.pending
+    for paper_id in pending:
+        job.failed.pop(paper_id, None)
+
+    job.status = "running"
+    job.message = f"正在重新处理 {len(pending)} 篇论文。"
+    job.updated_at = utc_now_iso()
+    storage.write_job(job)
+
+    try:
+        # spawn: the API calls this from a worker thread, and forking a threaded process can deadlock.
+        with ProcessPoolExecutor(max_workers=max(1, workers), mp_context=multiprocessing.get_context("spawn")) as pool:
+            futures: dict[Future[list[str]], str] = {}
+            for paper_id in pending:
+                paper = papers.get(paper_id)
+                if paper is None:
+                    job.failed[paper_id] = "论文不存在。"
+                    continue
+                future = pool.submit(
+                    _reprocess_worker,
+                    str(storage.base_dir),
+                    str(storage.templates_dir),
+                    storage.chunk_codec,
+                    storage.chunk_block_size,
+                    paper.model_dump(),
+                    job.template_name,
+                    job.max_chunk_chars,
+                    job.chunk_overlap,
+                )
+                futures[future] = paper_id
+
+            for future in as_completed(futures):
+                paper_id = futures[future]
+                try:
+                    tags = future.result()
+                except BrokenExecutor as exc:
+                    # The pool died (OOM, signal) before this paper's outputs were touched:
+                    # keep its library status and leave it pending for a resume.
+                    job.failed[paper_id] = f"工作进程异常退出：{exc}"
+                except Exception as exc:
+                    job.failed[paper_id] = str(exc)
+                    storage.update_paper_status(paper_id, "failed")
+                else:
+                    job.completed.append(paper_id)
+                    storage.update_paper_status(paper_id, "completed", domain_tags=tags)
+                job.updated_at = utc_now_iso()
+                storage.write_job(job)
+                if on_progress:
+                    on_progress(job, paper_id)
+    except Exception as exc:
+        job.status = "failed"
+        job.message = f"任务失败：{exc}"
+    else:
+        job.status = "done"
+        job.message = f"已完成 {len(job.completed)} 篇，失败 {len(job.failed)} 篇。"
+    job.updated_at = utc_now_iso()
+    storage.write_job(job)
+    return job
+
+
+def _prefetched(fn: Callable[[T], R], items: Iterable[T], workers: int) -> Iterator[R]:
+    """Map `fn` over `items` on a thread pool, in order, keeping at most `workers` results in flight."""
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+        in_flight: deque[Future[R]] = deque()
+        for item in items:
+            in_flight.append(pool.submit(fn, item))
+            if len(in_flight) >= workers:
+                yield in_flight.popleft().result()
+        while in_flight:
+            yield in_flight.popleft().result()
+
+
+def load_paper_bundle(storage: Storage, paper: PaperMeta) -> dict:
+    return {
+        "paper": paper.model_dump(),
+        "chunks": storage.load_chunks(paper.paper_id),
+        "results": {kind: storage.read_result(paper.paper_id, kind) for kind in RESULT_FILE_MAP},
+    }
+
+
+def iter_export_jsonl(storage: Storage, papers: list[PaperMeta], workers: int = 4) -> Iterator[bytes]:
+    for bundle in _prefetched(lambda paper: load_paper_bundle(storage, paper), papers, workers):
+        yield (json.dumps(bundle, ensure_ascii=False) + "\n").encode("utf-8")
+
+
+class _StreamBuffer:
+    """Write-only sink for `zipfile` that hands out what has been written so far."""
+
+    def __init__(self) -> None:
+        self._buffer = bytearray()
+
+    def write(self, data: bytes) -> int:
+        self._buffer += data
+        return len(data)
+
+    def flush(self) -> None:
+        pass
+
+    def drain(self) -> bytes:
+        data = bytes(self._buffer)
+        self._buffer.clear()
+        return data
+
+
+def iter_export_zip(storage: Storage, papers: list[PaperMeta], workers: int = 4) -> Iterator[bytes]:
+    sink = _StreamBuffer()
+    with zipfile.ZipFile(sink, mode="w", compression=zipfile.ZIP_DEFLATED) as archive:
+        archive.writestr(
+            "papers.json",
+            json.dumps([paper.model_dump() for paper in papers], ensure_ascii=False, indent=2),
+        )
+        yield sink.drain()
+        for bundle in _prefetched(lambda paper: load_paper_bundle(storage, paper), papers, workers):
+            paper_id = bundle["paper"]["paper_id"]
+            archive.writestr(f"{paper_id}/meta.json", json.dumps(bundle["paper"], ensure_ascii=False, indent=2))
+            with archive.open(f"{paper_id}/chunks.jsonl", mode="w") as output:
+                for chunk in bundle["chunks"]:
+                    output.write((json.dumps(chunk, ensure_ascii=False) + "\n").encode("utf-8"))
+            for kind, content in bundle["results"].items():
+                if content:
+                    archive.writestr(f"{paper_id}/{RESULT_FILE_MAP[kind]}", content)
+            yield sink.drain()
+    yield sink.drain()
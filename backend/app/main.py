@@ -1,10 +1,12 @@
 import asyncio
+import contextlib
 import datetime as dt
-import re
+import secrets
 import uuid
+from functools import lru_cache
 from pathlib import Path
 
-from fastapi import FastAPI, File, Form, HTTPException, UploadFile
+from fastapi import Depends, FastAPI, File, Form, Header, HTTPException, Query, Response, UploadFile
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import FileResponse, StreamingResponse
 
@@ -14,22 +16,62 @@ from .schemas import (
     ChatRequest,
     ChatResponse,
     ContentResponse,
+    ExportFormat,
+    PaperFilter,
     PaperMeta,
+    ReadinessResponse,
+    ReprocessJob,
+    ReprocessRequest,
     SystemInfoResponse,
     TemplateInfo,
     UploadResponse,
 )
+from .retrieval import IndexCache
 from .storage import Storage
+from .warmup import WarmupTracker, warm_recent_indexes
 
 settings = get_settings()
 backend_root = Path(__file__).resolve().parents[1]
-storage = Storage(
-    base_dir=backend_root / settings.data_dir,
-    templates_dir=backend_root / settings.templates_dir,
-)
 broker = TaskBroker()
+warmup_tracker = WarmupTracker()
+# job_id -> paper ids claimed by a reprocess job running in this process.
+active_jobs: dict[str, set[str]] = {}
+
+
+@lru_cache
+def get_storage() -> Storage:
+    return Storage(
+        base_dir=backend_root / settings.data_dir,
+        templates_dir=backend_root / settings.templates_dir,
+        chunk_codec=settings.chunk_store_codec,
+        chunk_block_size=settings.chunk_store_block_size,
+    )
+
+
+@lru_cache
+def get_index_cache() -> IndexCache:
+    return IndexCache(get_storage(), max_papers=settings.index_cache_size)
+
+
+@contextlib.asynccontextmanager
+async def lifespan(_: FastAPI):
+    warmup_task = asyncio.create_task(
+        warm_recent_indexes(
+            storage=await asyncio.to_thread(get_storage),
+            cache=get_index_cache(),
+            tracker=warmup_tracker,
+            limit=settings.warmup_paper_count,
+        )
+    )
+    try:
+        yield
+    finally:
+        warmup_task.cancel()
+        with contextlib.suppress(asyncio.CancelledError):
+            await warmup_task
+
 
-app = FastAPI(title=settings.app_name)
+app = FastAPI(title=settings.app_name, lifespan=lifespan)
 app.add_middleware(
     CORSMiddleware,
     allow_origins=settings.cors_origin_list,
@@ -43,30 +85,8 @@ def utc_now_year() -> int:
     return dt.datetime.now(dt.timezone.utc).year
 
 
-def tokenize(text: str) -> set[str]:
-    return set(re.findall(r"[a-zA-Z0-9]+", text.lower()))
-
-
-def retrieve_contexts(question: str, chunks: list[str], top_k: int) -> list[str]:
-    if not chunks:
-        return []
-    q_tokens = tokenize(question)
-    scored: list[tuple[float, str]] = []
-    for chunk in chunks:
-        c_tokens = tokenize(chunk)
-        if not c_tokens:
-            continue
-        overlap = len(q_tokens.intersection(c_tokens))
-        score = overlap / (len(q_tokens) + 1)
-        scored.append((score, chunk))
-    ranked = sorted(scored, key=lambda item: item[0], reverse=True)
-    selected = [item[1] for item in ranked[:top_k] if item[0] > 0]
-    if not selected:
-        return chunks[:top_k]
-    return selected
-
-
 async def execute_pipeline(task_id: str, paper_id: str, title: str, target_language: str, template_name: str) -> None:
+    storage = get_storage()
     try:
         tags = await run_pipeline(
             task_id=task_id,
@@ -79,6 +99,7 @@ async def execute_pipeline(task_id: str, paper_id: str, title: str, target_langu
             settings=settings,
         )
         storage.update_paper_status(paper_id, "completed", domain_tags=tags)
+        get_index_cache().invalidate(paper_id)
     except Exception as exc:
         storage.update_paper_status(paper_id, "failed")
         await broker.update(task_id, "failed", 100, f"任务失败：{exc}")
@@ -89,6 +110,14 @@ async def health() -> dict:
     return {"status": "ok"}
 
 
+@app.get(f"{settings.api_prefix}/ready", response_model=ReadinessResponse)
+async def ready(response: Response) -> ReadinessResponse:
+    snapshot = warmup_tracker.snapshot()
+    if not snapshot.ready:
+        response.status_code = 503
+    return snapshot
+
+
 @app.get(f"{settings.api_prefix}/system/info", response_model=SystemInfoResponse)
 async def get_system_info() -> SystemInfoResponse:
     return SystemInfoResponse(
@@ -102,7 +131,7 @@ async def get_system_info() -> SystemInfoResponse:
 
 @app.get(f"{settings.api_prefix}/templates", response_model=list[TemplateInfo])
 async def list_templates() -> list[TemplateInfo]:
-    return [TemplateInfo(name=name) for name in storage.list_templates()]
+    return [TemplateInfo(name=name) for name in get_storage().list_templates()]
 
 
 @app.post(f"{settings.api_prefix}/upload", response_model=UploadResponse)
@@ -114,6 +143,7 @@ async def upload_paper(
     if not file.filename or not file.filename.lower().endswith(".pdf"):
         raise HTTPException(status_code=400, detail="仅支持上传 PDF 文件。")
 
+    storage = get_storage()
     paper_id = uuid.uuid4().hex[:12]
     task_id = uuid.uuid4().hex
     storage.save_upload(paper_id, file)
@@ -166,12 +196,12 @@ async def task_events(task_id: str):
 
 @app.get(f"{settings.api_prefix}/papers", response_model=list[PaperMeta])
 async def list_papers() -> list[PaperMeta]:
-    return storage.list_papers()
+    return get_storage().list_papers()
 
 
 @app.get(f"{settings.api_prefix}/papers/{{paper_id}}", response_model=PaperMeta)
 async def get_paper(paper_id: str) -> PaperMeta:
-    paper = storage.get_paper(paper_id)
+    paper = get_storage().get_paper(paper_id)
     if not paper:
         raise HTTPException(status_code=404, detail="论文不存在。")
     return paper
@@ -181,6 +211,7 @@ async def get_paper(paper_id: str) -> PaperMeta:
 async def get_content(paper_id: str, kind: str) -> ContentResponse:
     if kind not in {"translation", "summary", "improvement"}:
         raise HTTPException(status_code=400, detail="不支持的内容类型。")
+    storage = get_storage()
     if not storage.get_paper(paper_id):
         raise HTTPException(status_code=404, detail="论文不存在。")
     content = storage.read_result(paper_id, kind)  # type: ignore[arg-type]
@@ -189,7 +220,7 @@ async def get_content(paper_id: str, kind: str) -> ContentResponse:
 
 @app.get(f"{settings.api_prefix}/papers/{{paper_id}}/pdf")
 async def get_pdf(paper_id: str):
-    pdf_path = storage.pdf_path(paper_id)
+    pdf_path = get_storage().pdf_path(paper_id)
     if not pdf_path.exists():
         raise HTTPException(status_code=404, detail="PDF 文件不存在。")
     return FileResponse(pdf_path, media_type="application/pdf", filename=f"{paper_id}.pdf")
@@ -197,11 +228,11 @@ async def get_pdf(paper_id: str):
 
 @app.post(f"{settings.api_prefix}/papers/{{paper_id}}/chat", response_model=ChatResponse)
 async def chat(paper_id: str, payload: ChatRequest) -> ChatResponse:
+    storage = get_storage()
     if not storage.get_paper(paper_id):
         raise HTTPException(status_code=404, detail="论文不存在。")
 
-    chunks = storage.load_chunks(paper_id)
-    contexts = retrieve_contexts(payload.question, chunks, payload.top_k)
+    contexts = get_index_cache().retrieve(paper_id, payload.question, payload.top_k)
     if not contexts:
         contexts = [storage.read_result(paper_id, "summary")[:500] or "暂无可用上下文。"]
 
@@ -223,6 +254,103 @@ async def chat(paper_id: str, payload: ChatRequest) -> ChatResponse:
     return ChatResponse(answer="\n".join(answer_lines), contexts=contexts)
 
 
+def require_admin(x_admin_token: str | None = Header(default=None)) -> None:
+    if not settings.admin_token:
+        raise HTTPException(status_code=403, detail="管理接口未启用。")
+    if not x_admin_token or not secrets.compare_digest(x_admin_token, settings.admin_token):
+        raise HTTPException(status_code=401, detail="管理令牌无效。")
+
+
+async def execute_reprocess_job(job: ReprocessJob) -> None:
+    from .library import run_reprocess_job
+
+    try:
+        await asyncio.to_thread(run_reprocess_job, get_storage(), job, settings.reprocess_workers)
+    finally:
+        active_jobs.pop(job.job_id, None)
+
+
+@app.post(
+    f"{settings.api_prefix}/admin/reprocess",
+    response_model=ReprocessJob,
+    dependencies=[Depends(require_admin)],
+)
+async def start_reprocess(payload: ReprocessRequest) -> ReprocessJob:
+    from .library import PapersBusyError, create_reprocess_job
+
+    # Runs on the loop without awaiting so selecting papers and claiming them is atomic
+    # with respect to other reprocess requests.
+    claimed = set().union(*active_jobs.values())
+    try:
+        job = create_reprocess_job(get_storage(), payload, settings, skip_paper_ids=claimed)
+    except PapersBusyError as exc:
+        raise HTTPException(status_code=409, detail=str(exc)) from exc
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc)) from exc
+    active_jobs[job.job_id] = set(job.paper_ids)
+    asyncio.create_task(execute_reprocess_job(job.model_copy(deep=True)))
+    return job
+
+
+@app.get(
+    f"{settings.api_prefix}/admin/jobs/{{job_id}}",
+    response_model=ReprocessJob,
+    dependencies=[Depends(require_admin)],
+)
+async def get_reprocess_job(job_id: str) -> ReprocessJob:
+    job = get_storage().read_job(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="任务不存在。")
+    return job
+
+
+@app.post(
+    f"{settings.api_prefix}/admin/jobs/{{job_id}}/resume",
+    response_model=ReprocessJob,
+    dependencies=[Depends(require_admin)],
+)
+async def resume_reprocess_job(job_id: str) -> ReprocessJob:
+    job = get_storage().read_job(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="任务不存在。")
+    if job_id in active_jobs:
+        raise HTTPException(status_code=409, detail="任务仍在执行中。")
+    pending = set(job.pending)
+    if any(pending & claimed for claimed in active_jobs.values()):
+        raise HTTPException(status_code=409, detail="部分论文正在被其他任务处理。")
+    # Claim the papers before yielding to the loop so a second request sees them as active.
+    active_jobs[job_id] = pending
+    asyncio.create_task(execute_reprocess_job(job.model_copy(deep=True)))
+    return job
+
+
+@app.get(
+    f"{settings.api_prefix}/admin/export",
+    dependencies=[Depends(require_admin)],
+)
+async def export_library(
+    format: ExportFormat = "jsonl",
+    paper_ids: list[str] | None = Query(default=None),
+    status: str | None = None,
+    domain_tag: str | None = None,
+):
+    from .library import iter_export_jsonl, iter_export_zip, select_papers
+
+    storage = get_storage()
+    papers = select_papers(storage, PaperFilter(paper_ids=paper_ids, status=status, domain_tag=domain_tag))
+    if format == "zip":
+        return StreamingResponse(
+            iter_export_zip(storage, papers, settings.export_prefetch),
+            media_type="application/zip",
+            headers={"Content-Disposition": 'attachment; filename="library.zip"'},
+        )
+    return StreamingResponse(
+        iter_export_jsonl(storage, papers, settings.export_prefetch),
+        media_type="application/x-ndjson",
+        headers={"Content-Disposition": 'attachment; filename="library.jsonl"'},
+    )
+
+
 if __name__ == "__main__":
     import uvicorn
 
@@ -5,8 +5,6 @@ import re
 from collections import defaultdict
 from pathlib import Path
 
-from pypdf import PdfReader
-
 from .config import Settings
 from .schemas import TaskState
 from .storage import Storage
@@ -17,6 +15,9 @@ def utc_now_iso() -> str:
 
 
 def extract_text_from_pdf(pdf_path: Path) -> str:
+    # pypdf is only needed once a paper is processed; keep it off the import path.
+    from pypdf import PdfReader
+
     try:
         reader = PdfReader(str(pdf_path))
         pages: list[str] = []
@@ -32,6 +33,9 @@ def extract_text_from_pdf(pdf_path: Path) -> str:
 
 
 def chunk_text(text: str, chunk_size: int, overlap: int) -> list[str]:
+    if overlap >= chunk_size:
+        # Otherwise the window never advances.
+        raise ValueError(f"chunk overlap ({overlap}) must be smaller than chunk size ({chunk_size})")
     normalized = re.sub(r"\s+", " ", text).strip()
     if not normalized:
         return []
@@ -204,6 +208,46 @@ class TaskBroker:
             self._subscribers[task_id].discard(queue)
 
 
+def parse_step(storage: Storage, paper_id: str, max_chunk_chars: int, chunk_overlap: int) -> tuple[str, list[str]]:
+    pdf_path = storage.pdf_path(paper_id)
+    if not pdf_path.exists():
+        raise FileNotFoundError(f"PDF 文件不存在：{pdf_path.name}")
+    text = extract_text_from_pdf(pdf_path)
+    chunks = chunk_text(text, max_chunk_chars, chunk_overlap)
+    storage.save_chunks(paper_id, chunks)
+    return text, chunks
+
+
+def translate_step(storage: Storage, paper_id: str, title: str, target_language: str, chunks: list[str]) -> None:
+    storage.write_result(paper_id, "translation", make_translation_markdown(title, target_language, chunks))
+
+
+def summarize_step(storage: Storage, paper_id: str, title: str, template_name: str, chunks: list[str]) -> None:
+    template = storage.read_template(template_name)
+    storage.write_result(paper_id, "summary", make_summary_markdown(title, template, chunks))
+
+
+def critique_step(storage: Storage, paper_id: str, title: str, text: str, chunks: list[str]) -> list[str]:
+    tags = infer_domain_tags(text)
+    storage.write_result(paper_id, "improvement", make_improvement_markdown(title, tags, chunks))
+    return tags
+
+
+def process_paper(
+    paper_id: str,
+    title: str,
+    target_language: str,
+    template_name: str,
+    storage: Storage,
+    max_chunk_chars: int,
+    chunk_overlap: int,
+) -> list[str]:
+    text, chunks = parse_step(storage, paper_id, max_chunk_chars, chunk_overlap)
+    translate_step(storage, paper_id, title, target_language, chunks)
+    summarize_step(storage, paper_id, title, template_name, chunks)
+    return critique_step(storage, paper_id, title, text, chunks)
+
+
 async def run_pipeline(
     task_id: str,
     paper_id: str,
@@ -215,41 +259,25 @@ async def run_pipeline(
     settings: Settings,
 ) -> list[str]:
     await broker.update(task_id, "parsing", 15, "正在解析 PDF 文本。")
-    text = await asyncio.to_thread(extract_text_from_pdf, storage.pdf_path(paper_id))
-    chunks = await asyncio.to_thread(
-        chunk_text,
-        text,
+    text, chunks = await asyncio.to_thread(
+        parse_step,
+        storage,
+        paper_id,
         settings.max_chunk_chars,
         settings.chunk_overlap,
     )
-    await asyncio.to_thread(storage.save_chunks, paper_id, chunks)
     await asyncio.sleep(0.2)
 
     await broker.update(task_id, "translating", 45, "正在生成全文翻译草稿。")
-    translation_md = await asyncio.to_thread(
-        make_translation_markdown,
-        title,
-        target_language,
-        chunks,
-    )
-    await asyncio.to_thread(storage.write_result, paper_id, "translation", translation_md)
+    await asyncio.to_thread(translate_step, storage, paper_id, title, target_language, chunks)
     await asyncio.sleep(0.2)
 
     await broker.update(task_id, "summarizing", 70, "正在提取核心思路。")
-    template = await asyncio.to_thread(storage.read_template, template_name)
-    summary_md = await asyncio.to_thread(make_summary_markdown, title, template, chunks)
-    await asyncio.to_thread(storage.write_result, paper_id, "summary", summary_md)
+    await asyncio.to_thread(summarize_step, storage, paper_id, title, template_name, chunks)
     await asyncio.sleep(0.2)
 
-    tags = infer_domain_tags(text)
     await broker.update(task_id, "critiquing", 90, "正在生成改进建议。")
-    improvement_md = await asyncio.to_thread(
-        make_improvement_markdown,
-        title,
-        tags,
-        chunks,
-    )
-    await asyncio.to_thread(storage.write_result, paper_id, "improvement", improvement_md)
+    tags = await asyncio.to_thread(critique_step, storage, paper_id, title, text, chunks)
     await asyncio.sleep(0.2)
 
     await broker.update(task_id, "done", 100, "任务已完成。")
@@ -0,0 +1,77 @@
+import re
+import threading
+from collections import OrderedDict
+from collections.abc import Sequence
+from dataclasses import dataclass
+
+from .chunk_store import ChunkReader, FileVersion, LegacyChunkReader
+from .storage import Storage
+
+
+def tokenize(text: str) -> set[str]:
+    return set(re.findall(r"[a-zA-Z0-9]+", text.lower()))
+
+
+def rank_chunks(question: str, token_sets: Sequence[set[str]], top_k: int) -> list[int]:
+    q_tokens = tokenize(question)
+    scored: list[tuple[float, int]] = []
+    for idx, c_tokens in enumerate(token_sets):
+        if not c_tokens:
+            continue
+        overlap = len(q_tokens.intersection(c_tokens))
+        score = overlap / (len(q_tokens) + 1)
+        scored.append((score, idx))
+    ranked = sorted(scored, key=lambda item: item[0], reverse=True)
+    return [item[1] for item in ranked[:top_k] if item[0] > 0]
+
+
+@dataclass
+class PaperIndex:
+    paper_id: str
+    version: FileVersion
+    token_sets: list[set[str]]
+
+
+class IndexCache:
+    """LRU of per-paper token indexes, invalidated when the chunk file changes."""
+
+    def __init__(self, storage: Storage, max_papers: int = 32) -> None:
+        self.storage = storage
+        self.max_papers = max_papers
+        self._indexes: OrderedDict[str, PaperIndex] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _index_for(self, paper_id: str, chunks: ChunkReader | LegacyChunkReader) -> PaperIndex:
+        with self._lock:
+            index = self._indexes.get(paper_id)
+            if index and index.version == chunks.version:
+                self._indexes.move_to_end(paper_id)
+                return index
+
+        index = PaperIndex(paper_id=paper_id, version=chunks.version, token_sets=[tokenize(chunk) for chunk in chunks])
+
+        with self._lock:
+            self._indexes[paper_id] = index
+            self._indexes.move_to_end(paper_id)
+            while len(self._indexes) > self.max_papers:
+                self._indexes.popitem(last=False)
+        return index
+
+    def get(self, paper_id: str) -> PaperIndex:
+        with self.storage.open_chunks(paper_id) as chunks:
+            return self._index_for(paper_id, chunks)
+
+    def invalidate(self, paper_id: str) -> None:
+        with self._lock:
+            self._indexes.pop(paper_id, None)
+
+    def retrieve(self, paper_id: str, question: str, top_k: int) -> list[str]:
+        # Rank and fetch through one reader so the index always matches the texts returned.
+        with self.storage.open_chunks(paper_id) as chunks:
+            index = self._index_for(paper_id, chunks)
+            if not index.token_sets:
+                return []
+            selected = rank_chunks(question, index.token_sets, top_k)
+            if not selected:
+                return list(chunks[:top_k])
+            return [chunks[idx] for idx in selected]
@@ -1,10 +1,15 @@
 from typing import Literal
 
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, model_validator
+
+from .config import get_settings
 
 
 ResultKind = Literal["translation", "summary", "improvement"]
 TaskStatus = Literal["queued", "parsing", "translating", "summarizing", "critiquing", "done", "failed"]
+WarmupStatus = Literal["pending", "warming", "ready", "failed"]
+JobStatus = Literal["queued", "running", "done", "failed"]
+ExportFormat = Literal["jsonl", "zip"]
 
 
 class UploadResponse(BaseModel):
@@ -59,3 +64,56 @@ class SystemInfoResponse(BaseModel):
     llm_model_name: str
     embedding_model_name: str
     pipeline_mode: str
+
+
+class ReadinessResponse(BaseModel):
+    ready: bool
+    degraded: bool = False
+    status: WarmupStatus
+    warmed: int
+    total: int
+    failed: list[str] = Field(default_factory=list)
+    started_at: str | None = None
+    finished_at: str | None = None
+
+
+class PaperFilter(BaseModel):
+    paper_ids: list[str] | None = None
+    status: str | None = None
+    domain_tag: str | None = None
+
+
+class ReprocessRequest(PaperFilter):
+    template_name: str = "tinghua.md"
+    max_chunk_chars: int | None = Field(default=None, ge=100)
+    chunk_overlap: int | None = Field(default=None, ge=0)
+
+    @model_validator(mode="after")
+    def check_chunk_overlap(self) -> "ReprocessRequest":
+        settings = get_settings()
+        max_chunk_chars = self.max_chunk_chars or settings.max_chunk_chars
+        chunk_overlap = self.chunk_overlap if self.chunk_overlap is not None else settings.chunk_overlap
+        if chunk_overlap >= max_chunk_chars:
+            raise ValueError(
+                f"chunk_overlap ({chunk_overlap}) must be smaller than max_chunk_chars ({max_chunk_chars})"
+            )
+        return self
+
+
+class ReprocessJob(BaseModel):
+    job_id: str
+    status: JobStatus
+    paper_ids: list[str]
+    template_name: str
+    max_chunk_chars: int
+    chunk_overlap: int
+    completed: list[str] = Field(default_factory=list)
+    failed: dict[str, str] = Field(default_factory=dict)
+    message: str = ""
+    created_at: str
+    updated_at: str
+
+    @property
+    def pending(self) -> list[str]:
+        done = set(self.completed)
+        return [paper_id for paper_id in self.paper_ids if paper_id not in done]
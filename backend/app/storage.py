@@ -1,10 +1,28 @@
+import contextlib
 import json
+import os
 import shutil
+import threading
+from collections.abc import Iterator
 from pathlib import Path
 
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
 from fastapi import UploadFile
 
-from .schemas import PaperMeta, ResultKind
+from .chunk_store import (
+    CHUNK_STORE_FILE,
+    LEGACY_CHUNKS_FILE,
+    ChunkReader,
+    LegacyChunkReader,
+    open_chunk_store,
+    write_chunk_store,
+)
+from .schemas import PaperMeta, ReprocessJob, ResultKind
 
 RESULT_FILE_MAP: dict[ResultKind, str] = {
     "translation": "translated_full.md",
@@ -14,18 +32,30 @@ RESULT_FILE_MAP: dict[ResultKind, str] = {
 
 
 class Storage:
-    def __init__(self, base_dir: Path, templates_dir: Path) -> None:
+    def __init__(
+        self,
+        base_dir: Path,
+        templates_dir: Path,
+        chunk_codec: str = "none",
+        chunk_block_size: int = 16,
+    ) -> None:
         self.base_dir = base_dir
         self.raw_dir = self.base_dir / "raw"
         self.processed_dir = self.base_dir / "processed"
+        self.jobs_dir = self.base_dir / "jobs"
         self.meta_file = self.base_dir / "papers.json"
+        self.meta_lock_file = self.base_dir / "papers.json.lock"
+        self._meta_lock = threading.Lock()
         self.templates_dir = templates_dir
+        self.chunk_codec = chunk_codec
+        self.chunk_block_size = chunk_block_size
         self._ensure_structure()
 
     def _ensure_structure(self) -> None:
         self.base_dir.mkdir(parents=True, exist_ok=True)
         self.raw_dir.mkdir(parents=True, exist_ok=True)
         self.processed_dir.mkdir(parents=True, exist_ok=True)
+        self.jobs_dir.mkdir(parents=True, exist_ok=True)
         self.templates_dir.mkdir(parents=True, exist_ok=True)
 
         if not self.meta_file.exists():
@@ -54,10 +84,31 @@ class Storage:
         return json.loads(self.meta_file.read_text(encoding="utf-8"))
 
     def _save_papers(self, papers: list[dict]) -> None:
-        self.meta_file.write_text(
+        tmp_path = self.meta_file.with_name(self.meta_file.name + ".tmp")
+        tmp_path.write_text(
             json.dumps(papers, ensure_ascii=False, indent=2),
             encoding="utf-8",
         )
+        os.replace(tmp_path, self.meta_file)
+
+    @contextlib.contextmanager
+    def _locked_papers(self) -> Iterator[None]:
+        # papers.json is updated by the API event loop, reprocess threads and the
+        # manage.py process; hold both a thread lock and a file lock for load/modify/save.
+        with self._meta_lock, self.meta_lock_file.open("a+b") as lock_file:
+            if fcntl is not None:
+                fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+            else:
+                lock_file.seek(0)
+                msvcrt.locking(lock_file.fileno(), msvcrt.LK_LOCK, 1)
+            try:
+                yield
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+                else:
+                    lock_file.seek(0)
+                    msvcrt.locking(lock_file.fileno(), msvcrt.LK_UNLCK, 1)
 
     def list_papers(self) -> list[PaperMeta]:
         papers = [PaperMeta.model_validate(item) for item in self._load_papers()]
@@ -70,24 +121,26 @@ class Storage:
         return None
 
     def upsert_paper(self, payload: PaperMeta) -> None:
-        papers = self._load_papers()
         serialized = payload.model_dump()
-        for idx, item in enumerate(papers):
-            if item["paper_id"] == payload.paper_id:
-                papers[idx] = serialized
-                self._save_papers(papers)
-                return
-        papers.append(serialized)
-        self._save_papers(papers)
+        with self._locked_papers():
+            papers = self._load_papers()
+            for idx, item in enumerate(papers):
+                if item["paper_id"] == payload.paper_id:
+                    papers[idx] = serialized
+                    break
+            else:
+                papers.append(serialized)
+            self._save_papers(papers)
 
     def update_paper_status(self, paper_id: str, status: str, domain_tags: list[str] | None = None) -> None:
-        papers = self._load_papers()
-        for item in papers:
-            if item["paper_id"] == paper_id:
-                item["status"] = status
-                if domain_tags is not None:
-                    item["domain_tags"] = domain_tags
-        self._save_papers(papers)
+        with self._locked_papers():
+            papers = self._load_papers()
+            for item in papers:
+                if item["paper_id"] == paper_id:
+                    item["status"] = status
+                    if domain_tags is not None:
+                        item["domain_tags"] = domain_tags
+            self._save_papers(papers)
 
     def save_upload(self, paper_id: str, upload: UploadFile) -> Path:
         destination = self.raw_dir / f"{paper_id}.pdf"
@@ -114,17 +167,35 @@ class Storage:
         return output_file.read_text(encoding="utf-8")
 
     def save_chunks(self, paper_id: str, chunks: list[str]) -> None:
-        path = self.paper_output_dir(paper_id) / "chunks.json"
-        path.write_text(
-            json.dumps(chunks, ensure_ascii=False, indent=2),
-            encoding="utf-8",
+        output_dir = self.paper_output_dir(paper_id)
+        write_chunk_store(
+            output_dir / CHUNK_STORE_FILE,
+            chunks,
+            codec=self.chunk_codec,
+            block_size=self.chunk_block_size,
         )
+        legacy_path = output_dir / LEGACY_CHUNKS_FILE
+        if legacy_path.exists():
+            legacy_path.unlink()
+
+    def open_chunks(self, paper_id: str) -> ChunkReader | LegacyChunkReader:
+        return open_chunk_store(self.paper_output_dir(paper_id))
 
     def load_chunks(self, paper_id: str) -> list[str]:
-        path = self.paper_output_dir(paper_id) / "chunks.json"
+        with self.open_chunks(paper_id) as chunks:
+            return list(chunks)
+
+    def write_job(self, job: ReprocessJob) -> None:
+        path = self.jobs_dir / f"{job.job_id}.json"
+        tmp_path = path.with_name(path.name + ".tmp")
+        tmp_path.write_text(job.model_dump_json(indent=2), encoding="utf-8")
+        tmp_path.replace(path)
+
+    def read_job(self, job_id: str) -> ReprocessJob | None:
+        path = self.jobs_dir / f"{job_id}.json"
         if not path.exists():
-            return []
-        return json.loads(path.read_text(encoding="utf-8"))
+            return None
+        return ReprocessJob.model_validate_json(path.read_text(encoding="utf-8"))
 
     def list_templates(self) -> list[str]:
         templates: list[str] = []
@@ -0,0 +1,61 @@
+import asyncio
+
+from .pipeline import utc_now_iso
+from .retrieval import IndexCache
+from .schemas import ReadinessResponse, WarmupStatus
+from .storage import Storage
+
+
+class WarmupTracker:
+    def __init__(self) -> None:
+        self.status: WarmupStatus = "pending"
+        self.total = 0
+        self.warmed = 0
+        self.failed: list[str] = []
+        self.started_at: str | None = None
+        self.finished_at: str | None = None
+
+    @property
+    def ready(self) -> bool:
+        return self.status == "ready"
+
+    @property
+    def finished(self) -> bool:
+        return self.status in {"ready", "failed"}
+
+    @property
+    def degraded(self) -> bool:
+        return self.status == "failed" or bool(self.failed)
+
+    def snapshot(self) -> ReadinessResponse:
+        return ReadinessResponse(
+            ready=self.ready,
+            degraded=self.degraded,
+            status=self.status,
+            warmed=self.warmed,
+            total=self.total,
+            failed=list(self.failed),
+            started_at=self.started_at,
+            finished_at=self.finished_at,
+        )
+
+
+async def warm_recent_indexes(storage: Storage, cache: IndexCache, tracker: WarmupTracker, limit: int) -> None:
+    tracker.status = "warming"
+    tracker.started_at = utc_now_iso()
+    try:
+        papers = await asyncio.to_thread(storage.list_papers)
+        recent = [paper.paper_id for paper in papers if paper.status == "completed"][: max(0, limit)]
+        tracker.total = len(recent)
+        for paper_id in recent:
+            try:
+                await asyncio.to_thread(cache.get, paper_id)
+            except Exception:
+                tracker.failed.append(paper_id)
+            else:
+                tracker.warmed += 1
+        tracker.status = "ready"
+    except Exception:
+        tracker.status = "failed"
+    finally:
+        tracker.finished_at = utc_now_iso()
@@ -0,0 +1,121 @@
+"""Cold-start benchmark for the API process.
+
+Run from `backend/`:
+
+    python benchmarks/bench_cold_start.py --runs 5 --papers 20
+
+Each run uses a fresh interpreter against a temporary data directory seeded
+with `--papers` completed papers, and reports the time to import `app.main`,
+the time until the lifespan hook has started (when `/api/health` can answer),
+and the time until background warmup has finished.
+"""
+
+import argparse
+import datetime as dt
+import json
+import os
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+BACKEND_ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(BACKEND_ROOT))
+
+from app.chunk_store import CHUNK_STORE_FILE, write_chunk_store  # noqa: E402
+
+WORDS = "backdoor trigger model training dataset attack defense time series forecast token language vision".split()
+
+PROBE = """
+import asyncio
+import json
+import time
+
+started = time.perf_counter()
+import app.main as main
+imported = time.perf_counter()
+
+
+async def probe():
+    async with main.app.router.lifespan_context(main.app):
+        serving = time.perf_counter()
+        while not main.warmup_tracker.finished:
+            await asyncio.sleep(0.005)
+        warmed = time.perf_counter()
+    return serving, warmed
+
+
+serving, warmed = asyncio.run(probe())
+print(json.dumps({
+    "import_s": imported - started,
+    "serving_s": serving - started,
+    "ready_s": warmed - started,
+    "warmed_papers": main.warmup_tracker.warmed,
+}))
+"""
+
+
+def seed_library(data_dir: Path, papers: int, chunks_per_paper: int) -> None:
+    rng = random.Random(0)
+    processed_dir = data_dir / "processed"
+    metas: list[dict] = []
+    for idx in range(papers):
+        paper_id = f"bench{idx:04d}"
+        paper_dir = processed_dir / paper_id
+        paper_dir.mkdir(parents=True)
+        chunks = [" ".join(rng.choices(WORDS, k=140)) for _ in range(chunks_per_paper)]
+        write_chunk_store(paper_dir / CHUNK_STORE_FILE, chunks)
+        metas.append(
+            {
+                "paper_id": paper_id,
+                "title": f"Benchmark paper {idx}",
+                "source_filename": f"{paper_id}.pdf",
+                "created_at": (dt.datetime(2026, 1, 1, tzinfo=dt.timezone.utc) + dt.timedelta(minutes=idx)).isoformat(),
+                "target_language": "Chinese",
+                "status": "completed",
+            }
+        )
+    (data_dir / "papers.json").write_text(json.dumps(metas), encoding="utf-8")
+
+
+def run_once(env: dict[str, str]) -> dict:
+    completed = subprocess.run(
+        [sys.executable, "-c", PROBE],
+        cwd=BACKEND_ROOT,
+        env=env,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return json.loads(completed.stdout.strip().splitlines()[-1])
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Measure API cold-start time.")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--papers", type=int, default=20, help="papers seeded into the temporary library")
+    parser.add_argument("--chunks", type=int, default=200, help="chunks per seeded paper")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix="bench_cold_start_") as tmp:
+        data_dir = Path(tmp) / "data"
+        templates_dir = Path(tmp) / "templates"
+        seed_library(data_dir, args.papers, args.chunks)
+        env = {
+            **os.environ,
+            "DATA_DIR": str(data_dir),
+            "TEMPLATES_DIR": str(templates_dir),
+            "WARMUP_PAPER_COUNT": str(args.papers),
+        }
+        results = [run_once(env) for _ in range(max(1, args.runs))]
+
+    for key in ("import_s", "serving_s", "ready_s"):
+        values = [item[key] for item in results]
+        print(f"{key:<10} median={statistics.median(values) * 1000:8.1f} ms  max={max(values) * 1000:8.1f} ms")
+    print(f"warmed papers: {results[-1]['warmed_papers']} of {args.papers}")
+
+
+if __name__ == "__main__":
+    main()
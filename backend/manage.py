@@ -0,0 +1,122 @@
+import argparse
+import sys
+from pathlib import Path
+
+from pydantic import ValidationError
+
+from app.config import get_settings
+from app.library import (
+    create_reprocess_job,
+    iter_export_jsonl,
+    iter_export_zip,
+    run_reprocess_job,
+    select_papers,
+)
+from app.schemas import PaperFilter, ReprocessJob, ReprocessRequest
+from app.storage import Storage
+
+
+def build_storage() -> Storage:
+    settings = get_settings()
+    backend_root = Path(__file__).resolve().parent
+    return Storage(
+        base_dir=backend_root / settings.data_dir,
+        templates_dir=backend_root / settings.templates_dir,
+        chunk_codec=settings.chunk_store_codec,
+        chunk_block_size=settings.chunk_store_block_size,
+    )
+
+
+def add_filter_arguments(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument("--paper-id", dest="paper_ids", action="append", help="restrict to this paper (repeatable)")
+    parser.add_argument("--status", help="only papers with this status, e.g. completed")
+    parser.add_argument("--domain-tag", help="only papers carrying this domain tag")
+
+
+def reprocess(args: argparse.Namespace) -> int:
+    settings = get_settings()
+    storage = build_storage()
+    if args.resume:
+        job = storage.read_job(args.resume)
+        if not job:
+            print(f"job not found: {args.resume}", file=sys.stderr)
+            return 1
+    else:
+        try:
+            request = ReprocessRequest(
+                paper_ids=args.paper_ids,
+                status=args.status,
+                domain_tag=args.domain_tag,
+                template_name=args.template,
+                max_chunk_chars=args.max_chunk_chars,
+                chunk_overlap=args.chunk_overlap,
+            )
+        except ValidationError as exc:
+            for error in exc.errors():
+                print(f"invalid arguments: {error['msg']}", file=sys.stderr)
+            return 2
+        try:
+            job = create_reprocess_job(storage, request, settings)
+        except ValueError as exc:
+            print(exc, file=sys.stderr)
+            return 1
+
+    print(f"job {job.job_id}: {len(job.pending)} of {len(job.paper_ids)} paper(s) pending")
+
+    def on_progress(current: ReprocessJob, paper_id: str) -> None:
+        done = len(current.completed) + len(current.failed)
+        outcome = f"failed: {current.failed[paper_id]}" if paper_id in current.failed else "ok"
+        print(f"[{done}/{len(current.paper_ids)}] {paper_id} {outcome}", flush=True)
+
+    job = run_reprocess_job(storage, job, args.workers or settings.reprocess_workers, on_progress)
+    print(job.message)
+    if job.status != "done" or job.failed:
+        print(f"resume with: python manage.py reprocess --resume {job.job_id}")
+        return 1
+    return 0
+
+
+def export(args: argparse.Namespace) -> int:
+    settings = get_settings()
+    storage = build_storage()
+    papers = select_papers(
+        storage,
+        PaperFilter(paper_ids=args.paper_ids, status=args.status, domain_tag=args.domain_tag),
+    )
+    iter_export = iter_export_zip if args.format == "zip" else iter_export_jsonl
+    output = sys.stdout.buffer if args.output == "-" else open(args.output, "wb")
+    try:
+        for block in iter_export(storage, papers, settings.export_prefetch):
+            output.write(block)
+    finally:
+        if output is not sys.stdout.buffer:
+            output.close()
+    print(f"exported {len(papers)} paper(s)", file=sys.stderr)
+    return 0
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Library maintenance commands.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    reprocess_parser = subparsers.add_parser("reprocess", help="rerun the pipeline over existing papers")
+    add_filter_arguments(reprocess_parser)
+    reprocess_parser.add_argument("--template", default="tinghua.md", help="summary template name")
+    reprocess_parser.add_argument("--max-chunk-chars", type=int)
+    reprocess_parser.add_argument("--chunk-overlap", type=int)
+    reprocess_parser.add_argument("--workers", type=int, help="process pool size")
+    reprocess_parser.add_argument("--resume", metavar="JOB_ID", help="continue an interrupted job")
+    reprocess_parser.set_defaults(handler=reprocess)
+
+    export_parser = subparsers.add_parser("export", help="stream the library as JSONL or zip")
+    add_filter_arguments(export_parser)
+    export_parser.add_argument("--format", choices=["jsonl", "zip"], default="jsonl")
+    export_parser.add_argument("-o", "--output", default="-", help="output file, '-' for stdout")
+    export_parser.set_defaults(handler=export)
+
+    args = parser.parse_args()
+    return args.handler(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())